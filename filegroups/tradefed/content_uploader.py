@@ -15,7 +15,6 @@
 #  limitations under the License.
 
 """The script to invoke content_uploader binary to upload artifacts to CAS."""
-import glob
 import logging
 import os
 import subprocess
@@ -25,14 +24,55 @@ CONTENT_PLOADER_PREBUILT_PATH = 'tools/tradefederation/prebuilts/'
 CONTENT_UPLOADER_BIN = 'content_uploader'
 CONTENT_UPLOADER_TIMEOUT_SECS = 1800 # 30 minutes
 LOG_PATH = 'logs/cas_uploader.log'
+CONTENT_UPLOADER_PATH_ENV = 'CONTENT_UPLOADER_BIN_PATH'
+CONTENT_UPLOADER_CACHE_FILE = os.path.join(
+    os.path.expanduser('~'), '.cache', 'content_uploader_path')
+
+def _read_cached_uploader(prebuilt_dir: str):
+    # The cache is stale once the prebuilt dir changed after it was written, or
+    # if it points outside this checkout or at a file that no longer exists.
+    try:
+        if os.path.getmtime(CONTENT_UPLOADER_CACHE_FILE) < os.path.getmtime(prebuilt_dir):
+            return None
+        with open(CONTENT_UPLOADER_CACHE_FILE, encoding='utf-8') as cache:
+            uploader = cache.read().strip()
+    except OSError:
+        return None
+    if uploader.startswith(prebuilt_dir + os.sep) and os.path.isfile(uploader):
+        return uploader
+    return None
+
+def _write_cached_uploader(uploader: str):
+    try:
+        os.makedirs(os.path.dirname(CONTENT_UPLOADER_CACHE_FILE), exist_ok=True)
+        with open(CONTENT_UPLOADER_CACHE_FILE, 'w', encoding='utf-8') as cache:
+            cache.write(uploader)
+    except OSError as e:
+        logging.warning('Failed to cache %s path: %s', CONTENT_UPLOADER_BIN, e)
+
+def _find_prebuilt_uploader(prebuilt_dir: str):
+    # Stop at the first match rather than listing the whole tree like a
+    # recursive glob does. Hidden dirs are skipped, as glob's '**' does.
+    for root, dirs, files in os.walk(prebuilt_dir, followlinks=True):
+        if CONTENT_UPLOADER_BIN in files:
+            return os.path.join(root, CONTENT_UPLOADER_BIN)
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+    return None
 
 def _get_prebuilt_uploader() -> str:
-    uploader = glob.glob(CONTENT_PLOADER_PREBUILT_PATH + '**/' + CONTENT_UPLOADER_BIN,
-                         recursive=True)
+    uploader = _get_env_var(CONTENT_UPLOADER_PATH_ENV)
+    if uploader:
+        return uploader
+    prebuilt_dir = os.path.abspath(CONTENT_PLOADER_PREBUILT_PATH)
+    uploader = _read_cached_uploader(prebuilt_dir)
+    if uploader:
+        return uploader
+    uploader = _find_prebuilt_uploader(prebuilt_dir)
     if not uploader:
         logging.error('%s not found in Tradefed prebuilt', CONTENT_UPLOADER_BIN)
         raise ValueError(f'Error: {CONTENT_UPLOADER_BIN} not found in Tradefed prebuilt')
-    return uploader[0]
+    _write_cached_uploader(uploader)
+    return uploader
 
 def _get_env_var(key: str, default=None, check=False):
     value = os.environ.get(key, default)
@@ -44,10 +84,12 @@ def _get_env_var(key: str, default=None, check=False):
 def _setup_logging() -> str:
     dist_dir = _get_env_var('DIST_DIR', check=True)
     log_file = os.path.join(dist_dir, LOG_PATH)
+    # delay=True defers opening the log file until something is logged, so a
+    # successful run that goes straight to the uploader never touches it.
     logging.basicConfig(
         level=logging.DEBUG,
         format='%(asctime)s %(levelname)s %(message)s',
-        filename=log_file,
+        handlers=[logging.FileHandler(log_file, delay=True)],
     )
     return log_file
 
@@ -59,9 +101,12 @@ def main():
     arguments = sys.argv[1:]
 
     try:
-        result = subprocess.run([uploader] + arguments, capture_output=True, text=True,
-                                check=True, timeout=CONTENT_UPLOADER_TIMEOUT_SECS)
-        print(result.stdout)
+        # stdout/stderr are inherited so the uploader's output streams live
+        # instead of being buffered in memory until it exits. Fds opened here
+        # are non-inheritable anyway, so close_fds=False only lets the child be
+        # started via posix_spawn instead of fork+exec.
+        subprocess.run([uploader] + arguments, check=True, close_fds=False,
+                       timeout=CONTENT_UPLOADER_TIMEOUT_SECS)
     except FileNotFoundError:
         print(f'content_uploader.py will export logs to: {log_file}')
         logging.error('Uploader not found: %s', log_file)